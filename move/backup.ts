@@ -1,52 +1,98 @@
  
 
 /**
- * Function to update an existing profile.
+ * Function to execute several move calls in one programmable transaction block.
+ * Each call's `arguments` builder receives the shared transaction and the
+ * results of the calls before it, so a later call can consume an earlier one's
+ * return value.
+ * @param {Array<{target: string, arguments: (tx, results) => any[]}>} calls - Targets are `module::function`.
  */
-export async function updateProfile(signer, profileId, displayName, bio, avatarCid) {
+export async function batchMoveCalls(signer, calls) {
+    if (calls.length === 0) {
+      throw new Error('batchMoveCalls requires at least one move call');
+    }
     const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::profile::update_profile`,
-      arguments: [
-        tx.object(profileId),
-        tx.pure.string(displayName),
-        tx.pure.string(bio),
-        tx.pure.string(avatarCid),
-      ],
-    });
-    tx.setGasBudget(10000);
+    const results = [];
+    for (const call of calls) {
+      results.push(tx.moveCall({
+        target: `${PACKAGE_ID}::${call.target}`,
+        arguments: call.arguments(tx, results),
+      }));
+    }
+    tx.setGasBudget(10000 * calls.length);
     return await signer.signAndExecuteTransaction({ transaction: tx });
   }
+
+/**
+ * Function to execute a single move call; shared by the helpers below.
+ */
+async function executeMoveCall(signer, target, args) {
+    return await batchMoveCalls(signer, [{ target, arguments: args }]);
+  }
+
+// Object IDs of registry tables, keyed by `registryId::field`. A registry's
+// tables are created in its init and never replaced, so they are resolved once.
+const registryTableIds = new Map<string, string>();
+
+/**
+ * Function to check whether a registry's address-keyed table has an entry for
+ * `address`, as a single dynamic-field lookup on the table.
+ */
+async function hasRegistryEntry(registryId, field, address) {
+    const key = `${registryId}::${field}`;
+    let tableId = registryTableIds.get(key);
+    if (tableId === undefined) {
+      const { data } = await client.getObject({
+        id: registryId,
+        options: { showContent: true },
+      });
+      tableId = data.content.fields[field].fields.id.id;
+      registryTableIds.set(key, tableId);
+    }
+    const response = await client.getDynamicFieldObject({
+      parentId: tableId,
+      name: { type: 'address', value: address },
+    });
+    // The RPC reports failures in the response body rather than throwing.
+    if (response.error) {
+      if (response.error.code === 'dynamicFieldNotFound') {
+        return false;
+      }
+      throw new Error(`Registry lookup failed: ${response.error.code}`);
+    }
+    return response.data != null;
+  }
+
+/**
+ * Function to update an existing profile.
+ */
+export async function updateProfile(signer, profileId, displayName, bio, avatarCid) {
+    return await executeMoveCall(signer, 'profile::update_profile', (tx) => [
+      tx.object(profileId),
+      tx.pure.string(displayName),
+      tx.pure.string(bio),
+      tx.pure.string(avatarCid),
+    ]);
+  }
   
   /**
    * Function to delete a profile.
    */
   export async function deleteProfile(signer, profileId) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::profile::delete_profile`,
-      arguments: [tx.object(profileId)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'profile::delete_profile', (tx) => [tx.object(profileId)]);
   }
   
   
   
   /**
    * Function to check if a user already has a profile.
+   * Profiles live in the shared registry's table, keyed by wallet address.
    * @param {string} address - The wallet address to check.
    * @returns {Promise<boolean>}
    */
   export async function checkProfileExists(address: string): Promise<boolean> {
     try {
-      const response = await client.getOwnedObjects({
-        owner: address,
-        filter: { StructType: `${PACKAGE_ID}::profile::UserProfile` },
-      });
-  
-      const objects = response?.data ?? [];
-      return objects.length > 0;
+      return await hasRegistryEntry(PROFILE_REGISTRY_ID, 'profiles', address);
     } catch (error) {
       console.error('Error checking profile existence:', error);
       throw new Error('Failed to check profile existence');
@@ -59,13 +105,7 @@ export async function updateProfile(signer, profileId, displayName, bio, avatarC
    * Function to reset a user profile (Admin only).
    */
   export async function resetProfile(signer, profileId) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::profile::reset_profile`,
-      arguments: [tx.object(profileId), tx.object(ADMIN_CAP_ID)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'profile::reset_profile', (tx) => [tx.object(profileId), tx.object(ADMIN_CAP_ID)]);
   }
   
   
@@ -73,65 +113,35 @@ export async function updateProfile(signer, profileId, displayName, bio, avatarC
    * Function to initialize a new kiosk.
    */
   export async function initKiosk(signer) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::kiosk::init_kiosk`,
-      arguments: [],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'kiosk::init_kiosk', () => []);
   }
   
   /**
    * Function to publish an item in the kiosk.
    */
   export async function publishItem(signer, kioskId, title, contentCid, price) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::kiosk::publish_item`,
-      arguments: [tx.object(kioskId), tx.pure.string(title), tx.pure.string(contentCid), tx.pure.u64(price)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'kiosk::publish_item', (tx) => [tx.object(kioskId), tx.pure.string(title), tx.pure.string(contentCid), tx.pure.u64(price)]);
   }
   
   /**
    * Function to buy an item from the kiosk.
    */
   export async function buyItem(signer, kioskId, itemId, paymentCoinId) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::kiosk::buy_item`,
-      arguments: [tx.object(kioskId), tx.pure.string(itemId), tx.object(paymentCoinId)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'kiosk::buy_item', (tx) => [tx.object(kioskId), tx.pure.string(itemId), tx.object(paymentCoinId)]);
   }
   
   /**
    * Function to withdraw funds from the kiosk.
    */
   export async function withdrawFunds(signer, kioskId) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::kiosk::withdraw_funds`,
-      arguments: [tx.object(kioskId)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'kiosk::withdraw_funds', (tx) => [tx.object(kioskId)]);
   }
   
   /**
    * Function to delete the kiosk (Admin only).
    */
   export async function deleteKiosk(signer, kioskId) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::kiosk::delete_kiosk`,
-      arguments: [tx.object(kioskId), tx.object(ADMIN_CAP_ID)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'kiosk::delete_kiosk', (tx) => [tx.object(kioskId), tx.object(ADMIN_CAP_ID)]);
   }
   
   /**
@@ -153,64 +163,50 @@ export async function updateProfile(signer, profileId, displayName, bio, avatarC
    * Function to initialize a new mailbox.
    */
   export async function initMailbox(signer) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::messaging_with_nft::init_mailbox`,
-      arguments: [],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'messaging_with_nft::init_mailbox', () => []);
   }
   
   /**
    * Function to send a message with optional NFT.
    */
   export async function sendMessageWithNFT(signer, mailboxId, cid, nftObjectId, claimPrice) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::messaging_with_nft::send_message_with_nft`,
-      arguments: [tx.object(mailboxId), tx.pure.string(cid), tx.pure.address(nftObjectId), tx.pure.u64(claimPrice)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'messaging_with_nft::send_message_with_nft', (tx) => [tx.object(mailboxId), tx.pure.string(cid), tx.pure.address(nftObjectId), tx.pure.u64(claimPrice)]);
   }
   
   /**
    * Function to claim an NFT from a message.
    */
   export async function claimNFT(signer, mailboxId, messageId, paymentCoinId) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::messaging_with_nft::claim_nft`,
-      arguments: [tx.object(mailboxId), tx.pure.address(messageId), tx.object(paymentCoinId)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'messaging_with_nft::claim_nft', (tx) => [tx.object(mailboxId), tx.pure.address(messageId), tx.object(paymentCoinId)]);
   }
   
   /**
    * Function to delete a message.
    */
   export async function deleteMessage(signer, mailboxId, messageId) {
-    const tx = createTx();
-    tx.moveCall({
-      target: `${PACKAGE_ID}::messaging_with_nft::delete_message`,
-      arguments: [tx.object(mailboxId), tx.pure.address(messageId)],
-    });
-    tx.setGasBudget(10000);
-    return await signer.signAndExecuteTransaction({ transaction: tx });
+    return await executeMoveCall(signer, 'messaging_with_nft::delete_message', (tx) => [tx.object(mailboxId), tx.pure.address(messageId)]);
   }
   
+  // Wallets known to have a Mailbox. The registry never removes entries, so a
+  // positive result cannot go stale; negative results are not cached so a
+  // freshly created mailbox shows up on the next check.
+  const mailboxOwners = new Set<string>();
+
   /**
    * Function to fetch the mailbox state for a given wallet address.
+   * Mailboxes live in the shared registry's table rather than being owned by
+   * the wallet, so this looks up the table entry keyed by the address.
    */
   export async function fetchMailboxState(address) {
+    if (mailboxOwners.has(address)) {
+      return true;
+    }
     try {
-      const objects = await client.getOwnedObjects({
-        owner: address,
-        filter: { StructType: `${PACKAGE_ID}::messaging_with_nft::Mailbox` },
-      });
-      return objects.length > 0;
+      const hasMailbox = await hasRegistryEntry(MAILBOX_REGISTRY_ID, 'owner_to_mailbox', address);
+      if (hasMailbox) {
+        mailboxOwners.add(address);
+      }
+      return hasMailbox;
     } catch (error) {
       console.error('Error fetching mailbox state:', error);
       throw new Error('Failed to fetch mailbox state');